@@ -1,15 +1,30 @@
 import contextlib
+import copy
+import errno
 import importlib.resources
+import os
 import shutil
+import stat
+import sys
 import tempfile
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any
+from typing import Any, NamedTuple
 
-import git
 import typer
 import yaml
 from rich.console import Console
-from rich.panel import Panel
+
+if sys.platform == "linux":
+    import fcntl
+
+try:
+    from yaml import CSafeDumper as _Dumper
+    from yaml import CSafeLoader as _Loader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeDumper as _Dumper  # type: ignore[assignment]
+    from yaml import SafeLoader as _Loader  # type: ignore[assignment]
 
 app = typer.Typer(help="CLI tool for managing modern python skills.")
 console = Console()
@@ -19,27 +34,418 @@ CONFIG_FILE = CONFIG_DIR / "config.yaml"
 SKILL_DIR = CONFIG_DIR / "skill"
 DEFAULT_SOURCE_URL = "https://github.com/ChengJiale150/modern-python-skill"
 
+# Last parsed config, keyed on (path, st_mtime_ns, st_size) of the config file
+_CONFIG_CACHE: tuple[tuple[str, int, int], dict[str, Any]] | None = None
+
+
+def _config_cache_key() -> tuple[str, int, int]:
+    st = CONFIG_FILE.stat()
+    return (str(CONFIG_FILE), st.st_mtime_ns, st.st_size)
+
+
+_STR_TAG = "tag:yaml.org,2002:str"
+_RESOLVER = yaml.resolver.Resolver()
+
+
+class _NeedsFullLoaderError(Exception):
+    """The document uses more than nested mappings of str scalars."""
+
+
+def _event_value(event: yaml.Event, events: Iterator[yaml.Event]) -> Any:
+    """Build the str or nested dict that starts with event, as the safe loader would."""
+    if isinstance(event, yaml.MappingStartEvent) and event.implicit:
+        mapping: dict[str, Any] = {}
+        for key_event in events:
+            if isinstance(key_event, yaml.MappingEndEvent):
+                break
+            key = _event_value(key_event, events)
+            if not isinstance(key, str):
+                raise _NeedsFullLoaderError
+            mapping[key] = _event_value(next(events), events)
+        return mapping
+    if isinstance(event, yaml.ScalarEvent) and event.anchor is None:
+        # implicit is (plain and untagged, quoted and untagged)
+        if event.implicit[1]:
+            return event.value
+        if event.implicit[0]:
+            tag = _RESOLVER.resolve(yaml.ScalarNode, event.value, (True, False))  # type: ignore[no-untyped-call]
+            if tag == _STR_TAG:
+                return event.value
+    raise _NeedsFullLoaderError
+
+
+def _parse_config(data: bytes) -> Any:
+    """
+    Parse config YAML, building plain dicts straight from parser events.
+
+    The config is nested mappings of strings, so this skips the composer and
+    constructor. Anything else is handed to the full safe loader.
+    """
+    events = yaml.parse(data, Loader=_Loader)
+    try:
+        next(events)  # StreamStartEvent
+        if isinstance(next(events), yaml.StreamEndEvent):
+            return None
+        config = _event_value(next(events), events)
+        next(events)  # DocumentEndEvent
+        if not isinstance(next(events), yaml.StreamEndEvent):
+            raise _NeedsFullLoaderError
+        return config
+    except _NeedsFullLoaderError:
+        return yaml.load(data, Loader=_Loader)
+
 
 def load_config() -> dict[str, Any]:
     """Load configuration from the config file."""
-    if not CONFIG_FILE.exists():
+    global _CONFIG_CACHE
+    try:
+        key = _config_cache_key()
+    except (FileNotFoundError, NotADirectoryError):
         return {"source_url": DEFAULT_SOURCE_URL, "projects": {}}
     try:
-        with CONFIG_FILE.open() as f:
-            return yaml.safe_load(f) or {
-                "source_url": DEFAULT_SOURCE_URL,
-                "projects": {},
-            }
+        if _CONFIG_CACHE is not None and _CONFIG_CACHE[0] == key:
+            return copy.deepcopy(_CONFIG_CACHE[1])
+        config = _parse_config(CONFIG_FILE.read_bytes())
+        if not config or not isinstance(config, dict):
+            config = {"source_url": DEFAULT_SOURCE_URL, "projects": {}}
+        _CONFIG_CACHE = (key, config)
+        return copy.deepcopy(config)
     except Exception as e:
         console.print(f"[red]Error loading config:[/red] {e}")
         return {"source_url": DEFAULT_SOURCE_URL, "projects": {}}
 
 
+def _atomic_write(target: Path, data: bytes, mode: int | None) -> None:
+    """
+    Replace target with data via a fsynced sibling temp file.
+
+    The temp file gets mode (if given) before any data is written to it.
+    """
+    tmp = target.with_name(target.name + ".tmp")
+    # Left behind by an interrupted earlier save
+    with contextlib.suppress(FileNotFoundError):
+        tmp.unlink()
+    flags = (
+        os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+    )
+    fd = os.open(tmp, flags, 0o666 if mode is None else mode)
+    try:
+        try:
+            if mode is not None:
+                # os.open's mode is subject to the umask
+                tmp.chmod(mode)
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view) :]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        tmp.replace(target)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            tmp.unlink()
+        raise
+
+
 def save_config(config: dict[str, Any]) -> None:
-    """Save configuration to the config file."""
+    """
+    Save configuration to the config file.
+
+    The file is replaced atomically, and left alone if its contents would not change.
+    A symlinked config file is written through to its target, keeping its mode.
+    """
+    global _CONFIG_CACHE
+    data = yaml.dump(config, Dumper=_Dumper, encoding="utf-8")
     CONFIG_DIR.mkdir(parents=True, exist_ok=True)
-    with CONFIG_FILE.open("w") as f:
-        yaml.dump(config, f)
+    target = CONFIG_FILE.resolve()
+    try:
+        mode: int | None = stat.S_IMODE(target.stat().st_mode)
+        unchanged = target.read_bytes() == data
+    except FileNotFoundError:
+        mode = None
+        unchanged = False
+    if not unchanged:
+        _atomic_write(target, data, mode)
+    _CONFIG_CACHE = (_config_cache_key(), copy.deepcopy(config))
+
+
+@contextlib.contextmanager
+def _mutating_config() -> Iterator[dict[str, Any]]:
+    """Load the config once for mutation, saving it on exit only if it changed."""
+    config = load_config()
+    original = copy.deepcopy(config)
+    yield config
+    if config != original:
+        save_config(config)
+
+
+_COPY_BUFSIZE = 1 << 20
+_SENDFILE_CHUNK = 1 << 30
+_MAX_COPY_WORKERS = 32
+# Never copied into, synced or deleted from skill directories
+_COPY_IGNORE = frozenset({".git", "__pycache__", ".DS_Store", "node_modules"})
+# errnos meaning "the kernel can't copy this pair of files, copy in userspace"
+_KERNEL_COPY_UNSUPPORTED = frozenset(
+    {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP}
+)
+
+
+def _reflink(src_fd: int, dst_fd: int) -> bool:
+    """
+    Make dst_fd share src_fd's extents on copy-on-write filesystems (btrfs, xfs).
+
+    Returns False if the pair can't be reflinked and the data must be copied.
+    """
+    if sys.platform == "linux":
+        try:
+            fcntl.ioctl(dst_fd, fcntl.FICLONE, src_fd)
+        except OSError:
+            return False
+        return True
+    return False
+
+
+def _copy_file_range(src_fd: int, dst_fd: int, size: int) -> bool:
+    """Copy src_fd, a file of size bytes, in the kernel; False if unsupported."""
+    if not hasattr(os, "copy_file_range"):
+        return False
+    try:
+        copied = 0
+        while n := os.copy_file_range(src_fd, dst_fd, _COPY_BUFSIZE):
+            copied += n
+    except OSError as e:
+        if e.errno not in _KERNEL_COPY_UNSUPPORTED:
+            raise
+        return False
+    # Some filesystems (procfs, sysfs, some FUSE) report 0 for non-empty files
+    return bool(copied or not size)
+
+
+def _sendfile(src_fd: int, dst_fd: int) -> bool:
+    """Copy the rest of src_fd with sendfile on Linux; False if unsupported."""
+    if sys.platform != "linux":
+        return False
+    try:
+        while os.sendfile(dst_fd, src_fd, None, _SENDFILE_CHUNK):
+            pass
+    except OSError as e:
+        if e.errno not in _KERNEL_COPY_UNSUPPORTED:
+            raise
+        return False
+    return True
+
+
+def _copy_fd(src_fd: int, dst_fd: int, size: int) -> None:
+    """Copy the remaining contents of src_fd, a file of size bytes, to dst_fd."""
+    # Each fallback continues from wherever the previous kernel-side copy stopped
+    if _copy_file_range(src_fd, dst_fd, size) or _sendfile(src_fd, dst_fd):
+        return
+    buf = bytearray(_COPY_BUFSIZE)
+    view = memoryview(buf)
+    with (
+        open(src_fd, "rb", buffering=0, closefd=False) as fsrc,
+        open(dst_fd, "wb", closefd=False) as fdst,
+    ):
+        while n := fsrc.readinto(buf):
+            fdst.write(view[:n])
+
+
+def _copyfile(src: str, dst: str) -> None:
+    """Copy a file's contents, permission bits and timestamps (like shutil.copy2)."""
+    flags = getattr(os, "O_BINARY", 0)
+    src_fd = os.open(src, os.O_RDONLY | flags)
+    try:
+        st = os.fstat(src_fd)
+        dst_fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | flags)
+        try:
+            if not _reflink(src_fd, dst_fd):
+                _copy_fd(src_fd, dst_fd, st.st_size)
+        finally:
+            os.close(dst_fd)
+    finally:
+        os.close(src_fd)
+    Path(dst).chmod(stat.S_IMODE(st.st_mode))
+    os.utime(dst, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+
+def _copy_files(pairs: list[tuple[str, str]]) -> None:
+    """Copy (src, dst) file pairs on a thread pool; the copy syscalls release the GIL."""
+    if not pairs:
+        return
+    workers = min(len(pairs), _MAX_COPY_WORKERS, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Consuming the results re-raises the first copy error
+        list(executor.map(lambda pair: _copyfile(*pair), pairs))
+
+
+def _mirror_dirs(
+    it: Iterator[os.DirEntry[str]],
+    dst: str,
+    files: list[tuple[str, str]],
+    dirs: list[tuple[str, str]],
+) -> None:
+    """
+    Recreate the directories listed by it under the already created dst,
+    collecting the (src, dst) files to copy and directories created, in pre-order.
+    """
+    for entry in it:
+        if entry.name in _COPY_IGNORE:
+            continue
+        # entry.path is already a str; plain concatenation avoids a Path per file
+        child = dst + os.sep + entry.name
+        if entry.is_dir():
+            with os.scandir(entry.path) as child_it:
+                Path(child).mkdir()
+                dirs.append((entry.path, child))
+                _mirror_dirs(child_it, child, files, dirs)
+        else:
+            files.append((entry.path, child))
+
+
+def _fast_copytree(src: str | Path, dst: str | Path) -> None:
+    """
+    Recursively copy src to dst, which must not exist yet.
+
+    Walks with os.scandir so entry types come from the directory listing
+    instead of a stat per entry, then copies file data concurrently, in the
+    kernel where possible. src is opened before dst is created, so a missing
+    src leaves nothing behind.
+    """
+    files: list[tuple[str, str]] = []
+    dirs = [(os.fspath(src), os.fspath(dst))]
+    with os.scandir(src) as it:
+        Path(dst).mkdir(parents=True)
+        _mirror_dirs(it, dirs[0][1], files, dirs)
+    _copy_files(files)
+    _copy_dir_stats(dirs)
+
+
+def _copy_dir_stats(dirs: list[tuple[str, str]]) -> None:
+    """
+    Copy permission bits and timestamps onto (src, dst) directories given in
+    pre-order, deepest first, so read-only directories are applied last.
+    """
+    for src_dir, dst_dir in reversed(dirs):
+        shutil.copystat(src_dir, dst_dir)
+
+
+class _Fingerprint(NamedTuple):
+    is_dir: bool
+    size: int
+    mtime_ns: int
+    mode: int
+
+
+# Fingerprint of a symlink in a destination tree: never equal to a real entry
+_LINK_FINGERPRINT = _Fingerprint(is_dir=False, size=-1, mtime_ns=-1, mode=-1)
+
+
+def _fingerprint(
+    root: str | Path, *, follow_symlinks: bool = True
+) -> dict[str, _Fingerprint]:
+    """
+    Map every entry under root, by relative path, to its size, mtime and
+    permission bits.
+
+    Directories only record their mode, since their mtime moves with their
+    contents. Entries are in pre-order: a directory always comes before its
+    contents. Without follow_symlinks, symlinks are leaves mapped to
+    _LINK_FINGERPRINT and are never walked through.
+    """
+    fingerprint: dict[str, _Fingerprint] = {}
+
+    def walk(path: str | Path, prefix: str) -> None:
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.name in _COPY_IGNORE:
+                    continue
+                rel = prefix + entry.name
+                if not follow_symlinks and entry.is_symlink():
+                    fingerprint[rel] = _LINK_FINGERPRINT
+                elif entry.is_dir():
+                    mode = stat.S_IMODE(entry.stat().st_mode)
+                    fingerprint[rel] = _Fingerprint(True, 0, 0, mode)
+                    walk(entry.path, rel + os.sep)
+                else:
+                    st = entry.stat()
+                    fingerprint[rel] = _Fingerprint(
+                        False, st.st_size, st.st_mtime_ns, stat.S_IMODE(st.st_mode)
+                    )
+
+    walk(root, "")
+    return fingerprint
+
+
+def _remove_stale(
+    dst_prefix: str, dst_fp: dict[str, _Fingerprint], stale: set[str]
+) -> None:
+    """Delete the stale entries of a destination tree fingerprinted as dst_fp."""
+    # Stale directories go as whole subtrees (rmtree doesn't follow links and
+    # also takes ignored entries); pre-order lets their contents be skipped
+    removed_dir: str | None = None
+    for rel, fp in dst_fp.items():
+        if removed_dir is not None and rel.startswith(removed_dir):
+            continue
+        if rel in stale:
+            if fp.is_dir:
+                shutil.rmtree(dst_prefix + rel)
+                removed_dir = rel + os.sep
+            else:
+                Path(dst_prefix + rel).unlink()
+
+
+def _sync_tree(src: str | Path, dst: str | Path) -> None:
+    """
+    Make dst a copy of src, only copying files whose size, mtime or mode differ
+    and only deleting entries that no longer exist in src.
+
+    src is always listed before dst is modified. Symlinks inside dst are
+    replaced, never written or deleted through.
+    """
+    # A missing dst gets a full copy
+    try:
+        dst_fp = _fingerprint(dst, follow_symlinks=False)
+    except FileNotFoundError:
+        _fast_copytree(src, dst)
+        return
+    src_fp = _fingerprint(src)
+    src_prefix = os.fspath(src) + os.sep
+    dst_prefix = os.fspath(dst) + os.sep
+    stale = {
+        rel
+        for rel, fp in dst_fp.items()
+        if rel not in src_fp
+        or fp == _LINK_FINGERPRINT
+        or fp.is_dir != src_fp[rel].is_dir
+    }
+    _remove_stale(dst_prefix, dst_fp, stale)
+
+    files: list[tuple[str, str]] = []
+    dirs: list[tuple[str, str]] = []
+    for rel, fp in src_fp.items():
+        exists = rel in dst_fp and rel not in stale
+        if exists and dst_fp[rel] == fp:
+            continue
+        if fp.is_dir:
+            if not exists:
+                Path(dst_prefix + rel).mkdir()
+            dirs.append((src_prefix + rel, dst_prefix + rel))
+        else:
+            if exists:
+                # Replace rather than truncate, in case the old copy is read-only
+                Path(dst_prefix + rel).unlink()
+            files.append((src_prefix + rel, dst_prefix + rel))
+    _copy_files(files)
+    _copy_dir_stats(dirs)
+
+
+def _is_missing_skill_dir(e: Exception) -> bool:
+    """Whether e was raised because SKILL_DIR itself does not exist."""
+    return (
+        isinstance(e, FileNotFoundError)
+        and e.filename is not None
+        and Path(e.filename) == SKILL_DIR
+    )
 
 
 @app.command()
@@ -48,7 +454,7 @@ def init() -> None:
     Initialize the tool, create ~/.modern-python-skill directory,
     and create config.yaml and skill directory.
     """
-    console.print(Panel("Initializing modern-python-skill...", style="bold blue"))
+    typer.secho("Initializing modern-python-skill...", fg=typer.colors.BLUE, bold=True)
 
     # Ensure config dir exists
     CONFIG_DIR.mkdir(parents=True, exist_ok=True)
@@ -79,10 +485,7 @@ def init() -> None:
                 )
                 raise typer.Exit(code=1)
 
-            if SKILL_DIR.exists():
-                shutil.rmtree(SKILL_DIR)
-
-            shutil.copytree(src_skill_path, SKILL_DIR)
+            _sync_tree(src_skill_path, SKILL_DIR)
             console.print(f"[green]Copied skills to {SKILL_DIR}[/green]")
 
     except Exception as e:
@@ -91,49 +494,47 @@ def init() -> None:
         with contextlib.suppress(Exception):
             src_skill_path = Path(__file__).parent / "skill"
             if src_skill_path.exists():
-                if SKILL_DIR.exists():
-                    shutil.rmtree(SKILL_DIR)
-                shutil.copytree(src_skill_path, SKILL_DIR)
+                _sync_tree(src_skill_path, SKILL_DIR)
                 console.print(f"[green]Copied skills to {SKILL_DIR} (fallback)[/green]")
                 return
         raise typer.Exit(code=1) from e
 
 
 @app.command()
-def add(name: str, path: str) -> None:
+def add(
+    name: str,
+    path: str,
+    resolve_symlinks: bool = typer.Option(
+        False, "--resolve-symlinks", help="Record the path with symlinks resolved"
+    ),
+) -> None:
     """
     Add a skill directory by copying ~/.modern-python-skill/skill contents
     to <path>/skill/modern-python-skill and recording it in config.yaml.
     """
-    target_root = Path(path).resolve()
+    if resolve_symlinks:
+        target_root = Path(path).resolve()
+    else:
+        # Pure string normalization: no per-component lstat like resolve()
+        target_root = Path(os.path.abspath(path))  # noqa: PTH100
     target_skill_dir = target_root / "modern-python-skill"
 
-    if not SKILL_DIR.exists():
-        console.print(
-            "[red]Error: ~/.modern-python-skill/skill does not exist. Please run 'init' first.[/red]"
-        )
-        raise typer.Exit(code=1)
-
     # Copy
-    if target_skill_dir.exists():
-        shutil.rmtree(target_skill_dir)
-
-    # Create parent dir if needed
-    target_skill_dir.parent.mkdir(parents=True, exist_ok=True)
-
     try:
-        shutil.copytree(SKILL_DIR, target_skill_dir)
+        _sync_tree(SKILL_DIR, target_skill_dir)
         console.print(f"[green]Copied skills to {target_skill_dir}[/green]")
     except Exception as e:
-        console.print(f"[red]Error copying skills to target:[/red] {e}")
+        if _is_missing_skill_dir(e):
+            console.print(
+                "[red]Error: ~/.modern-python-skill/skill does not exist. Please run 'init' first.[/red]"
+            )
+        else:
+            console.print(f"[red]Error copying skills to target:[/red] {e}")
         raise typer.Exit(code=1) from e
 
     # Update config
-    config = load_config()
-    if "projects" not in config:
-        config["projects"] = {}
-    config["projects"][name] = str(target_root)
-    save_config(config)
+    with _mutating_config() as config:
+        config.setdefault("projects", {})[name] = str(target_root)
     console.print(f"[green]Added project '{name}' with path {target_root}[/green]")
 
 
@@ -142,10 +543,11 @@ def remove(name: str) -> None:
     """
     Remove the corresponding skill directory entry from config.yaml.
     """
-    config = load_config()
-    if "projects" in config and name in config["projects"]:
-        del config["projects"][name]
-        save_config(config)
+    with _mutating_config() as config:
+        projects = config.get("projects") or {}
+        found = name in projects
+        projects.pop(name, None)
+    if found:
         console.print(f"[green]Removed project '{name}' from config.[/green]")
     else:
         console.print(f"[yellow]Project '{name}' not found in config.[/yellow]")
@@ -161,13 +563,19 @@ def update(
     Pull the latest git from mirror URL to a temporary directory,
     and overwrite the local skills.
     """
+    # GitPython is slow to import and only needed here
+    import git
+
     # Use mirror parameter as the source URL
     source_url = mirror
 
     with tempfile.TemporaryDirectory() as temp_dir:
         console.print(f"Cloning {source_url} to temporary directory...")
         try:
-            git.Repo.clone_from(source_url, temp_dir)
+            # Only the current tree is needed, so skip history and tags
+            git.Repo.clone_from(
+                source_url, temp_dir, depth=1, single_branch=True, no_tags=True
+            )
         except git.GitCommandError as e:
             console.print(f"[red]Error cloning repository:[/red] {e}")
             raise typer.Exit(code=1) from e
@@ -192,11 +600,8 @@ def update(
 
         console.print(f"Found skills at {found_skill_path}")
 
-        # Copy to ~/.modern-python-skill/skill
-        # Always overwrite for update command as per original mirror logic intent
-        if SKILL_DIR.exists():
-            shutil.rmtree(SKILL_DIR)
-        shutil.copytree(found_skill_path, SKILL_DIR)
+        # Copy to ~/.modern-python-skill/skill, dropping files removed upstream
+        _sync_tree(found_skill_path, SKILL_DIR)
         console.print(f"[green]Updated skills from {source_url}.[/green]")
 
 
@@ -205,29 +610,24 @@ def sync(name: str) -> None:
     """
     Sync the latest local skills to the specified project.
     """
-    config = load_config()
-    if "projects" not in config or name not in config["projects"]:
+    project_path = (load_config().get("projects") or {}).get(name)
+    if project_path is None:
         console.print(f"[red]Error: Project '{name}' not found.[/red]")
         raise typer.Exit(code=1)
 
-    target_root = Path(config["projects"][name])
+    target_root = Path(project_path)
     target_skill_dir = target_root / "modern-python-skill"
 
-    if not SKILL_DIR.exists():
-        console.print(
-            "[red]Error: ~/.modern-python-skill/skill does not exist. Please run 'init' first.[/red]"
-        )
-        raise typer.Exit(code=1)
-
-    if target_skill_dir.exists():
-        shutil.rmtree(target_skill_dir)
-
-    target_skill_dir.parent.mkdir(parents=True, exist_ok=True)
     try:
-        shutil.copytree(SKILL_DIR, target_skill_dir)
+        _sync_tree(SKILL_DIR, target_skill_dir)
         console.print(f"[green]Synced skills to {target_skill_dir}[/green]")
     except Exception as e:
-        console.print(f"[red]Error syncing skills:[/red] {e}")
+        if _is_missing_skill_dir(e):
+            console.print(
+                "[red]Error: ~/.modern-python-skill/skill does not exist. Please run 'init' first.[/red]"
+            )
+        else:
+            console.print(f"[red]Error syncing skills:[/red] {e}")
         raise typer.Exit(code=1) from e
 
 
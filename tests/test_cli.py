@@ -1,11 +1,17 @@
+import errno
+import os
 import shutil
+import stat
+import sys
 from pathlib import Path
 from unittest.mock import MagicMock
 
 import git
 import pytest
+import yaml
 from typer.testing import CliRunner
 
+from modern_python_skill import cli
 from modern_python_skill.cli import app, load_config, save_config
 
 runner = CliRunner()
@@ -44,6 +50,55 @@ def test_load_config_error(mock_env, monkeypatch):
     assert config["projects"] == {}
 
 
+@pytest.mark.parametrize(
+    "document",
+    [
+        "",
+        "projects: {}\nsource_url: test\n",
+        "projects:\n  a: /p/a\n  'b': \"/p/b\"\nsource_url: test\n",
+        "projects:\n  '123': /p\n  456: /q\n",
+        "projects: {a: null, b: true}\n",
+        "base: &base {a: /p}\nprojects: *base\n",
+        "projects: [a, b]\n",
+        "source_url: !!str 1\n",
+        "a: x\n---\na: y\n",
+        "just a string\n",
+    ],
+)
+def test_parse_config_matches_safe_load(document):
+    data = document.encode()
+    try:
+        expected = yaml.safe_load(data)
+    except yaml.YAMLError:
+        with pytest.raises(yaml.YAMLError):
+            cli._parse_config(data)
+    else:
+        assert cli._parse_config(data) == expected
+
+
+@pytest.mark.parametrize("document", ["just a string\n", "- a\n- b\n"])
+def test_load_config_non_mapping_root(mock_env, document):
+    mock_env["config_dir"].mkdir(parents=True, exist_ok=True)
+    mock_env["config_file"].write_text(document)
+
+    assert load_config()["projects"] == {}
+
+    result = runner.invoke(app, ["remove", "x"])
+    assert result.exit_code == 0
+    assert "Project 'x' not found" in result.stdout
+
+    result = runner.invoke(app, ["sync", "x"])
+    assert result.exit_code == 1
+    assert "Error: Project 'x' not found" in result.stdout
+
+
+def test_load_config_config_dir_is_a_file(mock_env):
+    mock_env["config_dir"].write_text("not a directory")
+
+    config = load_config()
+    assert config["projects"] == {}
+
+
 def test_save_config_creates_dir(mock_env):
     test_config = {"source_url": "test", "projects": {}}
     save_config(test_config)
@@ -51,6 +106,303 @@ def test_save_config_creates_dir(mock_env):
     assert mock_env["config_file"].exists()
 
 
+def test_save_config_skips_unchanged_write(mock_env):
+    test_config = {"source_url": "test", "projects": {"p": "path"}}
+    save_config(test_config)
+    before = mock_env["config_file"].stat()
+
+    save_config(test_config)
+
+    after = mock_env["config_file"].stat()
+    assert (after.st_ino, after.st_mtime_ns) == (before.st_ino, before.st_mtime_ns)
+    assert list(mock_env["config_dir"].iterdir()) == [mock_env["config_file"]]
+
+
+def test_save_config_replaces_changed_file(mock_env):
+    save_config({"source_url": "test", "projects": {}})
+    save_config({"source_url": "changed", "projects": {}})
+
+    assert "changed" in mock_env["config_file"].read_text()
+    assert list(mock_env["config_dir"].iterdir()) == [mock_env["config_file"]]
+
+
+def test_save_config_keeps_mode(mock_env):
+    save_config({"source_url": "test", "projects": {}})
+    mock_env["config_file"].chmod(0o600)
+
+    save_config({"source_url": "changed", "projects": {}})
+
+    assert stat.S_IMODE(mock_env["config_file"].stat().st_mode) == 0o600
+
+
+def test_save_config_cleans_up_failed_write(mock_env, monkeypatch):
+    save_config({"source_url": "test", "projects": {}})
+
+    def failing_fsync(_fd):
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    monkeypatch.setattr(os, "fsync", failing_fsync)
+    with pytest.raises(OSError, match="No space left"):
+        save_config({"source_url": "changed", "projects": {}})
+
+    assert list(mock_env["config_dir"].iterdir()) == [mock_env["config_file"]]
+    assert load_config()["source_url"] == "test"
+
+
+def test_save_config_replaces_stale_temp_file(mock_env):
+    mock_env["config_dir"].mkdir()
+    (mock_env["config_dir"] / "config.yaml.tmp").write_text("partial")
+
+    save_config({"source_url": "test", "projects": {}})
+
+    assert list(mock_env["config_dir"].iterdir()) == [mock_env["config_file"]]
+
+
+def test_save_config_writes_through_symlink(mock_env):
+    real_file = mock_env["tmp_path"] / "dotfiles" / "config.yaml"
+    real_file.parent.mkdir()
+    real_file.write_text("source_url: test\n")
+    mock_env["config_dir"].mkdir()
+    mock_env["config_file"].symlink_to(real_file)
+
+    save_config({"source_url": "changed", "projects": {}})
+
+    assert mock_env["config_file"].is_symlink()
+    assert "changed" in real_file.read_text()
+    assert load_config()["source_url"] == "changed"
+
+
+def test_load_config_cached_copy_is_isolated(mock_env):
+    save_config({"source_url": "test", "projects": {}})
+
+    config = load_config()
+    config["projects"]["mutated"] = "path"
+
+    assert load_config()["projects"] == {}
+
+
+def test_load_config_reparses_when_file_changes(mock_env):
+    save_config({"source_url": "test", "projects": {}})
+    assert load_config()["source_url"] == "test"
+
+    mock_env["config_file"].write_text("source_url: changed\nprojects: {}\n")
+
+    assert load_config()["source_url"] == "changed"
+
+
+# --- Copy Helper Tests ---
+
+
+@pytest.fixture
+def skill_tree(tmp_path):
+    src = tmp_path / "src_tree"
+    (src / "nested" / "deeper").mkdir(parents=True)
+    (src / "SKILL.md").write_text("top")
+    (src / "nested" / "deeper" / "ref.md").write_text("deep")
+    (src / "run.sh").write_text("#!/bin/sh")
+    (src / "run.sh").chmod(0o755)
+    return src
+
+
+def test_fast_copytree_copies_nested_tree(skill_tree, tmp_path):
+    dst = tmp_path / "dst_tree"
+    cli._fast_copytree(skill_tree, dst)
+
+    assert (dst / "SKILL.md").read_text() == "top"
+    assert (dst / "nested" / "deeper" / "ref.md").read_text() == "deep"
+    src_stat = (skill_tree / "run.sh").stat()
+    dst_stat = (dst / "run.sh").stat()
+    assert dst_stat.st_mode == src_stat.st_mode
+    assert dst_stat.st_mtime_ns == src_stat.st_mtime_ns
+
+
+def test_fast_copytree_copies_dir_stats(skill_tree, tmp_path):
+    (skill_tree / "nested" / "deeper").chmod(0o500)
+    (skill_tree / "nested").chmod(0o700)
+    dst = tmp_path / "dst_tree"
+    try:
+        cli._fast_copytree(skill_tree, dst)
+
+        for rel in ["nested", "nested/deeper"]:
+            src_stat = (skill_tree / rel).stat()
+            dst_stat = (dst / rel).stat()
+            assert dst_stat.st_mode == src_stat.st_mode
+            assert dst_stat.st_mtime_ns == src_stat.st_mtime_ns
+        assert (dst / "nested" / "deeper" / "ref.md").read_text() == "deep"
+    finally:
+        for root in (skill_tree, dst):
+            (root / "nested" / "deeper").chmod(0o755)
+
+
+def test_sync_tree_copies_dir_mode_changes(skill_tree, tmp_path):
+    dst = tmp_path / "dst_tree"
+    cli._fast_copytree(skill_tree, dst)
+    (skill_tree / "nested").chmod(0o700)
+
+    cli._sync_tree(skill_tree, dst)
+
+    assert stat.S_IMODE((dst / "nested").stat().st_mode) == 0o700
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="FICLONE is Linux-only")
+def test_copyfile_reflinks_when_supported(tmp_path, monkeypatch):
+    src = tmp_path / "src.md"
+    src.write_text("content")
+    ioctl = MagicMock()
+    monkeypatch.setattr(cli.fcntl, "ioctl", ioctl)
+    copy_file_range = MagicMock()
+    monkeypatch.setattr(os, "copy_file_range", copy_file_range)
+
+    cli._copyfile(src, tmp_path / "dst.md")
+
+    assert ioctl.call_args.args[1] == cli.fcntl.FICLONE
+    copy_file_range.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "unsupported_calls", [["copy_file_range"], ["copy_file_range", "sendfile"]]
+)
+def test_fast_copytree_falls_back_without_kernel_copy(
+    skill_tree, tmp_path, monkeypatch, unsupported_calls
+):
+    def unsupported(*_args):
+        raise OSError(errno.EXDEV, "cross-device")
+
+    for name in unsupported_calls:
+        monkeypatch.setattr(os, name, unsupported, raising=False)
+
+    dst = tmp_path / "dst_tree"
+    cli._fast_copytree(skill_tree, dst)
+    assert (dst / "nested" / "deeper" / "ref.md").read_text() == "deep"
+
+
+@pytest.mark.parametrize("link_name", ["nested", "gone"])
+def test_sync_tree_replaces_symlinked_dirs_without_following(
+    skill_tree, tmp_path, link_name
+):
+    dst = tmp_path / "dst_tree"
+    cli._fast_copytree(skill_tree, dst)
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    (outside / "mine.txt").write_text("mine")
+    if (dst / link_name).exists():
+        shutil.rmtree(dst / link_name)
+    (dst / link_name).symlink_to(outside, target_is_directory=True)
+
+    cli._sync_tree(skill_tree, dst)
+
+    assert sorted(p.name for p in outside.iterdir()) == ["mine.txt"]
+    assert (outside / "mine.txt").read_text() == "mine"
+    assert not (dst / "gone").exists()
+    assert not (dst / "nested").is_symlink()
+    assert (dst / "nested" / "deeper" / "ref.md").read_text() == "deep"
+
+
+def test_copy_skips_ignored_entries(skill_tree, tmp_path):
+    (skill_tree / "__pycache__").mkdir()
+    (skill_tree / "__pycache__" / "mod.pyc").write_bytes(b"\0")
+    (skill_tree / "nested" / ".DS_Store").write_bytes(b"\0")
+
+    dst = tmp_path / "dst_tree"
+    cli._fast_copytree(skill_tree, dst)
+    assert not (dst / "__pycache__").exists()
+    assert not (dst / "nested" / ".DS_Store").exists()
+
+    (dst / ".git").mkdir()
+    cli._sync_tree(skill_tree, dst)
+    assert (dst / ".git").is_dir()
+    assert not (dst / "__pycache__").exists()
+
+
+def test_sync_tree_removes_stale_dir_holding_ignored_entries(skill_tree, tmp_path):
+    (skill_tree / "scripts").mkdir()
+    (skill_tree / "scripts" / "tool.py").write_text("print()")
+    dst = tmp_path / "dst_tree"
+    cli._fast_copytree(skill_tree, dst)
+    (dst / "scripts" / "__pycache__").mkdir()
+    (dst / "scripts" / "__pycache__" / "tool.pyc").write_bytes(b"\0")
+    shutil.rmtree(skill_tree / "scripts")
+
+    cli._sync_tree(skill_tree, dst)
+    cli._sync_tree(skill_tree, dst)
+
+    assert not (dst / "scripts").exists()
+
+
+def test_copyfile_falls_back_when_copy_file_range_copies_nothing(tmp_path, monkeypatch):
+    src = tmp_path / "src.md"
+    src.write_text("content")
+    monkeypatch.setattr(cli, "_reflink", lambda *_args: False)
+    monkeypatch.setattr(os, "copy_file_range", lambda *_args: 0, raising=False)
+
+    cli._copyfile(str(src), str(tmp_path / "dst.md"))
+
+    assert (tmp_path / "dst.md").read_text() == "content"
+
+
+def test_fast_copytree_propagates_copy_errors(skill_tree, tmp_path, monkeypatch):
+    def failing(*_args):
+        raise OSError(errno.EIO, "I/O error")
+
+    monkeypatch.setattr(os, "copy_file_range", failing, raising=False)
+
+    with pytest.raises(OSError, match="I/O error"):
+        cli._fast_copytree(skill_tree, tmp_path / "dst_tree")
+
+
+def test_sync_tree_only_copies_changed_files(skill_tree, tmp_path, monkeypatch):
+    dst = tmp_path / "dst_tree"
+    cli._fast_copytree(skill_tree, dst)
+    (skill_tree / "SKILL.md").write_text("top, edited")
+
+    copied = []
+    original_copyfile = cli._copyfile
+
+    def tracking_copyfile(src, dst_file):
+        copied.append(Path(src).relative_to(skill_tree))
+        original_copyfile(src, dst_file)
+
+    monkeypatch.setattr(cli, "_copyfile", tracking_copyfile)
+    cli._sync_tree(skill_tree, dst)
+
+    assert copied == [Path("SKILL.md")]
+    assert (dst / "SKILL.md").read_text() == "top, edited"
+
+
+def test_sync_tree_copies_mode_only_changes(skill_tree, tmp_path):
+    dst = tmp_path / "dst_tree"
+    cli._fast_copytree(skill_tree, dst)
+    (skill_tree / "SKILL.md").chmod(0o755)
+
+    cli._sync_tree(skill_tree, dst)
+
+    assert stat.S_IMODE((dst / "SKILL.md").stat().st_mode) == 0o755
+
+
+def test_sync_tree_removes_stale_and_retyped_entries(skill_tree, tmp_path):
+    dst = tmp_path / "dst_tree"
+    cli._fast_copytree(skill_tree, dst)
+    (dst / "stale" / "sub").mkdir(parents=True)
+    (dst / "stale" / "sub" / "old.md").write_text("old")
+    # "run.sh" becomes a directory in dst, "nested" becomes a file in src
+    (dst / "run.sh").unlink()
+    (dst / "run.sh").mkdir()
+    (dst / "run.sh" / "inner.txt").write_text("inner")
+    shutil.rmtree(skill_tree / "nested")
+    (skill_tree / "nested").write_text("now a file")
+    (dst / "SKILL.md").chmod(0o444)
+    (skill_tree / "SKILL.md").write_text("top, edited")
+    (skill_tree / "added").mkdir()
+    (skill_tree / "added" / "new.md").write_text("new")
+
+    cli._sync_tree(skill_tree, dst)
+
+    assert cli._fingerprint(dst) == cli._fingerprint(skill_tree)
+    assert (dst / "SKILL.md").read_text() == "top, edited"
+    assert (dst / "nested").read_text() == "now a file"
+    assert (dst / "run.sh").read_text() == "#!/bin/sh"
+
+
 # --- Init Command Tests ---
 
 
@@ -60,6 +412,7 @@ def test_init_already_exists(mock_env):
 
     result = runner.invoke(app, ["init"])
     assert result.exit_code == 0
+    assert "Initializing modern-python-skill..." in result.stdout
     assert "Config already exists" in result.stdout
 
 
@@ -106,17 +459,15 @@ def test_init_fallback_with_existing_skill_dir(mock_env, monkeypatch):
 
     monkeypatch.setattr(pathlib.Path, "exists", mock_exists)
 
-    # Create SKILL_DIR to trigger line 94
+    # Existing SKILL_DIR is synced in place rather than removed
     mock_env["skill_dir"].mkdir(parents=True)
-
-    # Mock shutil.copytree to avoid actual copy
-    monkeypatch.setattr(shutil, "copytree", MagicMock())
-    monkeypatch.setattr(shutil, "rmtree", MagicMock())
+    (mock_env["skill_dir"] / "old.txt").write_text("old")
 
     result = runner.invoke(app, ["init"])
     assert result.exit_code == 0
     assert "(fallback)" in result.stdout
-    assert shutil.rmtree.called
+    assert not (mock_env["skill_dir"] / "old.txt").exists()
+    assert (mock_env["skill_dir"] / "SKILL.md").exists()
 
 
 # --- Add Command Tests ---
@@ -137,12 +488,32 @@ def test_add_success(mock_env):
     assert config["projects"]["my-project"] == str(target_path)
 
 
+@pytest.mark.parametrize("resolve_symlinks", [False, True])
+def test_add_symlinked_path(mock_env, resolve_symlinks):
+    mock_env["skill_dir"].mkdir(parents=True, exist_ok=True)
+    real_path = mock_env["tmp_path"] / "real_project"
+    real_path.mkdir()
+    link_path = mock_env["tmp_path"] / "linked_project"
+    link_path.symlink_to(real_path)
+
+    args = ["add", "linked", str(link_path / "sub" / "..")]
+    if resolve_symlinks:
+        args.append("--resolve-symlinks")
+    result = runner.invoke(app, args)
+    assert result.exit_code == 0
+
+    expected = real_path if resolve_symlinks else link_path
+    assert load_config()["projects"]["linked"] == str(expected)
+    assert (real_path / "modern-python-skill").is_dir()
+
+
 def test_add_copy_error(mock_env, monkeypatch):
     mock_env["skill_dir"].mkdir(parents=True, exist_ok=True)
 
-    # Force copytree to fail
+    # Force _fast_copytree to fail
     monkeypatch.setattr(
-        shutil, "copytree", MagicMock(side_effect=OSError("Copy failed"))
+        "modern_python_skill.cli._fast_copytree",
+        MagicMock(side_effect=OSError("Copy failed")),
     )
 
     result = runner.invoke(app, ["add", "fail-project", "/tmp/anywhere"])
@@ -157,6 +528,14 @@ def test_add_no_skill_dir(mock_env):
     assert "run 'init' first" in result.stdout
 
 
+def test_add_no_skill_dir_leaves_target_untouched(mock_env):
+    target_path = mock_env["tmp_path"] / "untouched"
+    result = runner.invoke(app, ["add", "no-skill", str(target_path)])
+    assert result.exit_code == 1
+    assert "run 'init' first" in result.stdout
+    assert not target_path.exists()
+
+
 # --- Remove Command Tests ---
 
 
@@ -169,18 +548,32 @@ def test_remove_success(mock_env):
     assert "p1" not in config["projects"]
 
 
+def test_remove_null_entry(mock_env):
+    mock_env["config_dir"].mkdir(parents=True)
+    mock_env["config_file"].write_text("projects: {p1: null}\n")
+
+    result = runner.invoke(app, ["remove", "p1"])
+    assert result.exit_code == 0
+    assert "Removed project 'p1'" in result.stdout
+    assert "p1" not in load_config()["projects"]
+
+
 def test_remove_not_found(mock_env):
     result = runner.invoke(app, ["remove", "non-existent"])
     assert result.exit_code == 0
     assert "Project 'non-existent' not found" in result.stdout
+    assert not mock_env["config_file"].exists()
 
 
 # --- Update Command Tests ---
 
 
 def test_update_success(mock_env, monkeypatch):
+    clone_kwargs = {}
+
     # Mock git.Repo.clone_from
-    def mock_clone(_url, to_path):
+    def mock_clone(_url, to_path, **kwargs):
+        clone_kwargs.update(kwargs)
         p = Path(to_path)
         skill_path = p / "skill"
         skill_path.mkdir(parents=True)
@@ -193,6 +586,7 @@ def test_update_success(mock_env, monkeypatch):
     assert result.exit_code == 0
     assert (mock_env["skill_dir"] / "new_skill.txt").exists()
     assert "Updated skills from" in result.stdout
+    assert clone_kwargs["depth"] == 1
 
 
 def test_update_clone_fail(mock_env, monkeypatch):
@@ -208,7 +602,7 @@ def test_update_clone_fail(mock_env, monkeypatch):
 
 
 def test_update_missing_skill_dir(mock_env, monkeypatch):
-    def mock_clone_no_skill(_url, _to_path):
+    def mock_clone_no_skill(_url, _to_path, **_kwargs):
         # Create a temp dir without 'skill' folder
         return MagicMock()
 
@@ -257,7 +651,8 @@ def test_sync_copy_error(mock_env, monkeypatch):
     mock_env["skill_dir"].mkdir(parents=True, exist_ok=True)
 
     monkeypatch.setattr(
-        shutil, "copytree", MagicMock(side_effect=Exception("Sync failed"))
+        "modern_python_skill.cli._fast_copytree",
+        MagicMock(side_effect=Exception("Sync failed")),
     )
 
     result = runner.invoke(app, ["sync", "project"])
@@ -283,8 +678,8 @@ def test_init_copy_fallback_success(mock_env, monkeypatch):
 
     monkeypatch.setattr(pathlib.Path, "exists", mock_exists)
 
-    # Mock shutil.copytree to avoid actual copy
-    monkeypatch.setattr(shutil, "copytree", MagicMock())
+    # Mock _fast_copytree to avoid actual copy
+    monkeypatch.setattr("modern_python_skill.cli._fast_copytree", MagicMock())
 
     result = runner.invoke(app, ["init"])
     assert result.exit_code == 0
@@ -322,7 +717,7 @@ def test_update_overwrite_existing(mock_env, monkeypatch):
     mock_env["skill_dir"].mkdir(parents=True, exist_ok=True)
     (mock_env["skill_dir"] / "old.txt").write_text("old")
 
-    def mock_clone(_url, to_path):
+    def mock_clone(_url, to_path, **_kwargs):
         p = Path(to_path)
         skill_path = p / "skill"
         skill_path.mkdir(parents=True)
@@ -415,7 +810,7 @@ def test_init_fallback_inner_exception(mock_env, monkeypatch):
         "importlib.resources.files", MagicMock(side_effect=Exception("Outer error"))
     )
 
-    # Mock fallback to fail during copytree
+    # Mock fallback to fail during _fast_copytree
     import pathlib
 
     original_exists = pathlib.Path.exists
@@ -428,7 +823,8 @@ def test_init_fallback_inner_exception(mock_env, monkeypatch):
     monkeypatch.setattr(pathlib.Path, "exists", mock_exists)
 
     monkeypatch.setattr(
-        shutil, "copytree", MagicMock(side_effect=Exception("Inner error"))
+        "modern_python_skill.cli._fast_copytree",
+        MagicMock(side_effect=Exception("Inner error")),
     )
 
     result = runner.invoke(app, ["init"])